@@ -34,6 +34,7 @@ python -m nuitka \
     --standalone \
     --onefile \
     --enable-plugin=pyside6 \
+    --nofollow-import-to=psutil \
     --macos-create-app-bundle \
     --include-data-file=version.txt=version.txt \
     --output-filename=BuildTestSystem \
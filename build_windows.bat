@@ -49,6 +49,7 @@ call venv\Scripts\activate
 python -m nuitka ^
     --standalone ^
     --enable-plugin=pyside6 ^
+    --nofollow-import-to=psutil ^
     --windows-console-mode=disable ^
     --windows-uac-admin ^
     --windows-company-name="Build Test Systems" ^
@@ -67,9 +68,21 @@ if %errorlevel% equ 0 (
     echo Windows build successful using %COMPILER_NAME%!
     echo Primary Windows executable created at: build\BuildTestSystem.exe
     
+    REM Build the update helper and ship it next to the application
+    echo Building update helper...
+    python -m nuitka ^
+        --onefile ^
+        --windows-console-mode=disable ^
+        %COMPILER_FLAGS% ^
+        --output-filename=updater_helper.exe ^
+        --output-dir=build ^
+        updater_helper.py
+    if exist build\main.dist copy build\updater_helper.exe build\main.dist\
+    
     REM Create Windows installer structure
     if not exist build\installer mkdir build\installer
     copy build\BuildTestSystem.exe build\installer\
+    copy build\updater_helper.exe build\installer\
     
     REM Create Windows-specific installer files
     echo Creating Windows installer package...
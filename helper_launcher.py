@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Update helper launcher for Build Test System
+
+Starts updater_helper and hands staged updates over to it. Kept apart from
+updater so the application can prewarm the helper at startup without
+loading requests and the rest of the download code.
+"""
+
+import sys
+import os
+import shutil
+import subprocess
+
+
+def is_compiled():
+    """Check if running as the Nuitka build - Nuitka sets __compiled__, never sys.frozen"""
+    return '__compiled__' in globals()
+
+
+class HelperLauncher:
+    """Start the update helper and pass it the staged update"""
+
+    # (process, event handle, job file) of a helper started by prewarm_helper
+    prewarmed_helper = None
+
+    @staticmethod
+    def get_app_dir():
+        """Get the application directory - compiled modules sit next to the exe in the
+        standalone build, while sys.executable points at a python.exe that is not shipped"""
+        return os.path.dirname(os.path.abspath(__file__))
+
+    @staticmethod
+    def get_helper_dir():
+        """Get the directory the update helper runs from and takes its job from - next
+        to the app, so only those who can change the app can change what runs elevated"""
+        helper_dir = HelperLauncher.get_app_dir().rstrip('\\/') + ".helper"
+        os.makedirs(helper_dir, exist_ok=True)
+        return helper_dir
+
+    @staticmethod
+    def get_helper_command():
+        """Get command line that starts the update helper"""
+        app_dir = HelperLauncher.get_app_dir()
+        if is_compiled():
+            # Run a copy outside app_dir so the helper can replace its own file there -
+            # always the same copy, refreshed only when the installed helper changes
+            helper_exe = os.path.join(app_dir, "updater_helper.exe")
+            helper_copy = os.path.join(HelperLauncher.get_helper_dir(), "updater_helper.exe")
+            installed = os.stat(helper_exe)
+            try:
+                copied = os.stat(helper_copy)
+                current = (copied.st_size, int(copied.st_mtime)) == (installed.st_size, int(installed.st_mtime))
+            except OSError:
+                current = False
+
+            if not current:
+                try:
+                    shutil.copy2(helper_exe, helper_copy)
+                except OSError:
+                    # The copy is still running for another instance of the app
+                    if not os.path.exists(helper_copy):
+                        raise
+            return [helper_copy]
+        else:
+            return [sys.executable, os.path.join(app_dir, "updater_helper.py")]
+
+    @staticmethod
+    def prewarm_helper():
+        """Start the update helper ahead of time, parked until an update is staged"""
+        if not sys.platform.startswith('win') or HelperLauncher.prewarmed_helper:
+            return
+
+        import ctypes
+
+        current_pid = os.getpid()
+        event_name = f"Local\\BuildTestSystemUpdate-{current_pid}"
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateEventW.restype = ctypes.c_void_p
+        event = kernel32.CreateEventW(None, True, False, event_name)
+        if not event:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        job_file = os.path.join(HelperLauncher.get_helper_dir(), f"update_job-{current_pid}.json")
+        process = subprocess.Popen(
+            HelperLauncher.get_helper_command() + ['--prewarm', event_name, job_file, str(current_pid)],
+            creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
+            close_fds=True
+        )
+        HelperLauncher.prewarmed_helper = (process, event, job_file)
+
+    @staticmethod
+    def launch_helper(helper_args):
+        """Hand the staged update to the prewarmed helper, or start a new one"""
+        if HelperLauncher.prewarmed_helper:
+            process, event, job_file = HelperLauncher.prewarmed_helper
+            if process.poll() is None:
+                import ctypes
+                import json
+
+                with open(job_file, 'w') as f:
+                    json.dump(helper_args, f)
+                ctypes.windll.kernel32.SetEvent(ctypes.c_void_p(event))
+                return
+
+        subprocess.Popen(
+            HelperLauncher.get_helper_command() + helper_args,
+            creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
+            close_fds=True
+        )
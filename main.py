@@ -2,269 +2,22 @@
 
 import sys
 import os
-import subprocess
-import time
-import requests
-import shutil
-import tempfile
-import zipfile
-import psutil
-from pathlib import Path
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QLabel, QMessageBox, QProgressBar
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
+import functools
+# Only what the window needs to paint - the updater module and its heavy
+# imports (requests, zipfile, ...) are loaded once the window is up
+from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QLabel, QProgressBar
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 
 
-# Embedded Updater Classes - No import issues!
-class PlatformDetector:
-    """Detect platform for S3 download"""
-    
-    @staticmethod
-    def get_platform():
-        """Get simplified platform name"""
-        if sys.platform == 'darwin':
-            return 'mac'
-        elif sys.platform.startswith('win'):
-            return 'windows'
-        else:
-            return 'linux'
-    
-    @staticmethod
-    def get_s3_url():
-        """Get S3 URL for current platform - Windows priority"""
-        # S3 Configuration - WINDOWS FOCUSED
-        # PRODUCTION: Using S3 for real updates
-        S3_URLS = {
-            'windows': 'https://release-jesus-automator.s3.us-east-1.amazonaws.com/releases/main.dist.zip',
-            'mac': 'https://your-s3-bucket.s3.amazonaws.com/BuildTestSystem-mac.zip'
-        }
-        
-        platform = PlatformDetector.get_platform()
-        url = S3_URLS.get(platform)
-        
-        if not url and platform != 'windows':
-            raise Exception(f"Windows is the primary target. Current platform: {platform}")
-        
-        return url
-    
-    @staticmethod
-    def get_filename():
-        """Get filename from S3 URL"""
-        url = PlatformDetector.get_s3_url()
-        if url:
-            return url.split('/')[-1]
-        return None
-
-
-class WindowsUpdater:
-    """Windows-specific update handling - Industrial grade file replacement"""
-    
-    @staticmethod
-    def get_current_executable():
-        """Get current executable path"""
-        if getattr(sys, 'frozen', False):
-            return sys.executable
-        else:
-            # When running from Python script, simulate the executable path
-            # This is for testing purposes
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            return os.path.join(script_dir, "BuildTestSystem.exe")
-    
-    @staticmethod
-    def get_current_process_id():
-        """Get current process ID"""
-        return os.getpid()
-    
-    @staticmethod
-    def create_backup(app_dir, backup_dir):
-        """Create backup of current application"""
-        try:
-            if os.path.exists(backup_dir):
-                shutil.rmtree(backup_dir)
-            shutil.copytree(app_dir, backup_dir, ignore=shutil.ignore_patterns('*.tmp', '*.log'))
-            return True
-        except Exception as e:
-            print(f"Backup failed: {e}")
-            return False
-    
-    @staticmethod
-    def install_from_zip(zip_file, current_exe, app_dir, backup_dir, temp_dir):
-        """Install from .zip file - Full application directory replacement"""
-        current_pid = WindowsUpdater.get_current_process_id()
-        
-        # Extract the zip file
-        extract_dir = os.path.join(temp_dir, "extract")
-        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        # Find the main application directory in extracted files
-        app_source_dir = None
-        # Always look for BuildTestSystem.exe regardless of current executable detection
-        main_exe_name = "BuildTestSystem.exe"
-        
-        for root, dirs, files in os.walk(extract_dir):
-            if main_exe_name in files:
-                app_source_dir = root
-                break
-        
-        if not app_source_dir:
-            raise Exception(f"Could not find {main_exe_name} in the update package")
-        
-        # Create backup
-        if not WindowsUpdater.create_backup(app_dir, backup_dir):
-            raise Exception("Failed to create backup")
-        
-        # Create simplified update script with proper path handling
-        update_script = os.path.join(temp_dir, "updater.bat")
-        
-        # Escape paths properly for batch script
-        app_dir_safe = app_dir.replace('/', '\\')
-        app_source_dir_safe = app_source_dir.replace('/', '\\')
-        backup_dir_safe = backup_dir.replace('/', '\\')
-        current_exe_safe = current_exe.replace('/', '\\')
-        extract_dir_safe = extract_dir.replace('/', '\\')
-        
-        script_content = f'''@echo off
-echo [UPDATER] Starting update process...
-echo [UPDATER] PID: {current_pid}
-
-REM Wait for application to close
-timeout /t 3 /nobreak > nul
-
-REM Kill process if still running
-taskkill /PID {current_pid} /F > nul 2>&1
-timeout /t 2 /nobreak > nul
-
-echo [UPDATER] Replacing files...
-
-REM Simple file replacement with retry
-set /a attempts=0
-:retry
-set /a attempts+=1
-if %attempts% GTR 3 goto error
-
-REM Use xcopy for simple file replacement
-xcopy /E /H /C /I /Q /Y "{app_source_dir_safe}" "{app_dir_safe}" > nul 2>&1
-if errorlevel 1 (
-    echo [UPDATER] Copy failed, retry %attempts%
-    timeout /t 2 /nobreak > nul
-    goto retry
-)
-
-echo [UPDATER] Files updated successfully
-echo [UPDATER] Starting application...
-start "" "{current_exe_safe}"
-goto cleanup
-
-:error
-echo [UPDATER] Update failed, restoring backup...
-if exist "{backup_dir_safe}" (
-    xcopy /E /H /C /I /Q /Y "{backup_dir_safe}" "{app_dir_safe}" > nul
-    start "" "{current_exe_safe}"
-)
-
-:cleanup
-timeout /t 2 /nobreak > nul
-rmdir /s /q "{extract_dir_safe}" > nul 2>&1
-del "%~f0" > nul 2>&1
-'''
-        
-        with open(update_script, 'w') as f:
-            f.write(script_content)
-        
-        # Run update script with proper permissions
-        try:
-            subprocess.Popen(
-                [update_script], 
-                shell=True,
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
-        except Exception as e:
-            # Fallback: try without special flags
-            subprocess.Popen([update_script], shell=True)
-
-
-class UpdateDownloader(QThread):
-    """Thread to download and install updates directly from S3"""
-    download_progress = Signal(int)  # percentage
-    download_complete = Signal(str)  # filepath
-    install_complete = Signal()
-    error = Signal(str)
-    
-    def __init__(self):
-        super().__init__()
-        self.platform = PlatformDetector.get_platform()
-        self.download_url = PlatformDetector.get_s3_url()
-        self.filename = PlatformDetector.get_filename()
-        self.temp_dir = tempfile.mkdtemp()
-        
-        if not self.download_url:
-            raise Exception(f"No S3 URL configured for {self.platform}")
-        
-    def run(self):
-        try:
-            self.download_file()
-        except Exception as e:
-            self.error.emit(f"Download failed: {str(e)}")
-    
-    def download_file(self):
-        """Download the update file from S3 with progress tracking"""
-        try:
-            response = requests.get(self.download_url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            file_path = os.path.join(self.temp_dir, self.filename)
-            total_size = int(response.headers.get('content-length', 0))
-            
-            with open(file_path, 'wb') as f:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            self.download_progress.emit(progress)
-            
-            self.download_complete.emit(file_path)
-            
-        except Exception as e:
-            raise Exception(f"S3 download failed: {str(e)}")
-    
-    def install_update(self, downloaded_file):
-        """Platform-specific installation - Windows optimized"""
-        try:
-            if self.platform == 'windows':
-                self.install_windows(downloaded_file)
-            else:
-                raise Exception("This build system is optimized for Windows.")
-            
-            self.install_complete.emit()
-            
-        except Exception as e:
-            raise Exception(f"Installation failed: {str(e)}")
-    
-    def install_windows(self, downloaded_file):
-        """Windows installation"""
-        current_exe = WindowsUpdater.get_current_executable()
-        app_dir = os.path.dirname(current_exe)
-        backup_dir = os.path.join(self.temp_dir, "backup")
-        
-        file_ext = Path(downloaded_file).suffix.lower()
-        
-        if file_ext == '.zip':
-            WindowsUpdater.install_from_zip(downloaded_file, current_exe, app_dir, backup_dir, self.temp_dir)
-        else:
-            raise Exception(f"Unsupported Windows update file type: {file_ext}")
-
+@functools.lru_cache(maxsize=1)
 def get_version():
-    """Read version from version.txt file"""
-    try:
-        with open('version.txt', 'r') as f:
-            return f.read().strip()
-    except FileNotFoundError:
+    """Read version from version.txt file next to the application"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'version.txt')
+    if not os.path.exists(path):
         return "1.0.0"
+    with open(path, 'r') as f:
+        return f.read().strip()
 
 
 class MainWindow(QMainWindow):
@@ -274,6 +27,9 @@ class MainWindow(QMainWindow):
         self.downloader = None
         self.init_ui()
         
+        # Start the update helper from the event loop, so installing later is instant
+        QTimer.singleShot(0, self.prewarm_updater)
+        
     def init_ui(self):
         self.setWindowTitle("Build Test System - Windows Edition")
         self.setGeometry(300, 300, 400, 300)
@@ -313,8 +69,25 @@ class MainWindow(QMainWindow):
         self.status_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.status_label)
         
+    def prewarm_updater(self):
+        """Start the update helper in the background - updates still work without it"""
+        # Only Windows has a helper
+        if not sys.platform.startswith('win'):
+            return
+        
+        # The launcher is light - the updater module stays unloaded until an update starts
+        from helper_launcher import HelperLauncher
+        
+        try:
+            HelperLauncher.prewarm_helper()
+        except Exception as e:
+            print(f"Update helper prewarm failed: {e}")
+    
     def start_update(self):
         """Start direct S3 update - Windows optimized"""
+        from PySide6.QtWidgets import QMessageBox
+        from updater import UpdateDownloader
+        
         reply = QMessageBox.question(
             self,
             "Download & Install Update",
@@ -329,10 +102,11 @@ class MainWindow(QMainWindow):
             self.status_label.setText("Downloading from S3...")
             
             try:
-                # Start direct download from S3 - Updater is now embedded!
+                # Start direct download from S3
                 self.downloader = UpdateDownloader()
                 self.downloader.download_progress.connect(self.on_download_progress)
                 self.downloader.download_complete.connect(self.on_download_complete)
+                self.downloader.extract_started.connect(self.on_extract_started)
                 self.downloader.install_complete.connect(self.on_install_complete)
                 self.downloader.error.connect(self.on_update_error)
                 self.downloader.start()
@@ -345,41 +119,26 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(percentage)
         self.status_label.setText(f"Downloading update... {percentage}%")
     
+    def on_extract_started(self):
+        """Show that the downloaded update is being unpacked"""
+        self.progress_bar.setVisible(False)
+        self.status_label.setText("Extracting update...")
+    
     def on_download_complete(self, file_path):
         """Handle download completion and start installation"""
-        self.status_label.setText("Installing update...")
+        # The user already confirmed in start_update - install right away
         self.progress_bar.setVisible(False)
+        self.status_label.setText("Installing update...\nThe application will restart automatically.")
         
-        # Ask for final confirmation before installation
-        reply = QMessageBox.question(
-            self,
-            "Install Update",
-            "Download complete! Install the update now?\n\nThe application will restart automatically.",
-            QMessageBox.Yes | QMessageBox.No
-        )
-        
-        if reply == QMessageBox.Yes:
-            self.status_label.setText("Starting installation...")
+        # Start the installation process and exit immediately
+        try:
+            self.downloader.install_update(file_path)
             
-            # Show final message and immediately start installation
-            QMessageBox.information(
-                self,
-                "Update Starting",
-                "Installation will begin now.\nThe application will close and restart automatically.\n\nDo not manually restart the application!"
-            )
+            # Exit immediately - let the Windows updater handle everything
+            self.force_exit()
             
-            # Start the installation process and exit immediately
-            try:
-                self.downloader.install_update(file_path)
-                
-                # Exit immediately - let the Windows updater handle everything
-                self.force_exit()
-                
-            except Exception as e:
-                self.on_update_error(f"Installation failed: {str(e)}")
-        else:
-            self.status_label.setText("Update cancelled")
-            self.update_button.setEnabled(True)
+        except Exception as e:
+            self.on_update_error(f"Installation failed: {str(e)}")
     
     def on_install_complete(self):
         """Handle installation completion - This shouldn't be called with new updater"""
@@ -389,9 +148,8 @@ class MainWindow(QMainWindow):
     def force_exit(self):
         """Force exit the application to allow file replacement"""
         try:
-            # Clean up downloader thread
-            if self.downloader and self.downloader.isRunning():
-                self.downloader.quit()
+            # Let a running download finish
+            if self.downloader and self.downloader.is_running():
                 self.downloader.wait(1000)  # Wait up to 1 second
             
             # Force close the application
@@ -410,6 +168,8 @@ class MainWindow(QMainWindow):
         pass
     
     def on_update_error(self, error_msg):
+        from PySide6.QtWidgets import QMessageBox
+        
         self.status_label.setText("Update failed")
         self.progress_bar.setVisible(False)
         QMessageBox.warning(self, "Update Error", error_msg)
@@ -417,9 +177,9 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle application close event"""
-        # Clean up downloader thread if running
-        if self.downloader and self.downloader.isRunning():
-            self.downloader.quit()
+        # Stop a running download - the thread pool is waited for on exit
+        if self.downloader and self.downloader.is_running():
+            self.downloader.cancel()
             self.downloader.wait(1000)
         event.accept()
 
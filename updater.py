@@ -16,11 +16,20 @@ import subprocess
 import shutil
 import tempfile
 import zipfile
+import io
+import hashlib
+import zlib
+import base64
+import functools
+import threading
 import time
-import psutil
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from pathlib import Path
-from PySide6.QtCore import QThread, Signal
-
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from helper_launcher import HelperLauncher
 
 # S3 Configuration - WINDOWS FOCUSED
 # Primary target: Windows
@@ -29,11 +38,183 @@ S3_URLS = {
     'mac': 'https://your-s3-bucket.s3.amazonaws.com/BuildTestSystem-mac.zip'   # Optional Mac support
 }
 
+# Number of parallel byte-range connections used for the S3 download
+RANGE_PARTS = 8
+
+# Smaller downloads are not worth splitting into ranges
+RANGE_MIN_SIZE = 16 * 1024 * 1024
+
+# Read size for the download loops
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Minimum seconds between download_progress updates
+PROGRESS_INTERVAL = 0.05
+
+# Copy buffer used when writing extracted zip members to disk
+EXTRACT_BUFFER_SIZE = 1024 * 1024
+
+# Zips up to this size are read into memory once and extracted from there
+EXTRACT_IN_MEMORY_SIZE = 256 * 1024 * 1024
+
+# Win32 CreateFileW flags for reading the download back sequentially during extraction
+GENERIC_READ = 0x80000000
+FILE_SHARE_READ = 0x1
+OPEN_EXISTING = 3
+FILE_FLAG_SEQUENTIAL_SCAN = 0x08000000
+
+
+def create_session():
+    """Create HTTP session that keeps S3 connections alive between requests"""
+    session = requests.Session()
+    session.headers['Connection'] = 'keep-alive'
+    # The update is a zip or exe - ask S3 for the bytes as stored, never re-encoded
+    session.headers['Accept-Encoding'] = 'identity'
+    # All traffic goes to the one S3 host - keep exactly one connection per range worker
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=RANGE_PARTS,
+        max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    )
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared by every download - connections and TLS sessions survive between updates
+_SESSION = create_session()
+
+
+def get_data_dir():
+    """Get the per-user directory the updater keeps its files in"""
+    base_dir = os.environ.get('LOCALAPPDATA', tempfile.gettempdir())
+    return os.path.join(base_dir, "BuildTestSystem")
+
+
+def open_unbuffered(file_path, truncate=True):
+    """Open file for unbuffered binary writes"""
+    # The download already writes 1 MiB chunks - a second buffer only adds copies
+    return open(file_path, 'wb' if truncate else 'r+b', buffering=0)
+
+
+def write_all(f, data):
+    """Write all of data to an unbuffered file - a raw write may take only part of it"""
+    view = memoryview(data)
+    while view:
+        written = f.write(view)
+        view = view[written:]
+
+
+def preallocate(f, size):
+    """Reserve size bytes for f in one call instead of growing it on every write"""
+    if hasattr(os, 'posix_fallocate'):
+        os.posix_fallocate(f.fileno(), 0, size)
+    else:
+        # SetEndOfFile on Windows - NTFS zero-fills lazily as the data is written
+        f.truncate(size)
+
+
+def open_sequential(file_path):
+    """Open file for reading with a hint that it is read front to back once"""
+    if not sys.platform.startswith('win'):
+        f = open(file_path, 'rb')
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return f
+    
+    import ctypes
+    import msvcrt
+    
+    # Larger read-ahead, and pages are dropped from the cache once read
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateFileW.restype = ctypes.c_void_p
+    handle = kernel32.CreateFileW(
+        file_path,
+        GENERIC_READ,
+        FILE_SHARE_READ,
+        None,
+        OPEN_EXISTING,
+        FILE_FLAG_SEQUENTIAL_SCAN,
+        None
+    )
+    if handle is None or handle == ctypes.c_void_p(-1).value:
+        raise ctypes.WinError(ctypes.get_last_error())
+    
+    fd = msvcrt.open_osfhandle(handle, os.O_RDONLY)
+    return os.fdopen(fd, 'rb')
+
+
+def extract_zip(zip_file, extract_dir, members=None, cancelled=None):
+    """Extract zip members (all by default) in parallel with large buffered writes -
+    stops at the next member once the cancelled event is set"""
+    extract_root = os.path.abspath(extract_dir)
+    if members is None:
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            members = zip_ref.infolist()
+    
+    # Check every path and create the directory tree once, up front
+    targets = []
+    directories = set()
+    for info in members:
+        target = os.path.abspath(os.path.join(extract_root, info.filename))
+        # A directory entry like ./ is the extract root itself - fine, like extractall
+        if info.is_dir() and target == extract_root:
+            directories.add(target)
+            continue
+        if not target.startswith(extract_root + os.sep):
+            raise Exception(f"Unsafe path in update package: {info.filename}")
+        
+        if info.is_dir():
+            directories.add(target)
+        else:
+            directories.add(os.path.dirname(target))
+            targets.append((info, target))
+    
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+    
+    # Read a modest zip from disk once - workers then inflate from memory
+    # instead of each seeking around the archive on its own handle
+    data = None
+    if os.path.getsize(zip_file) <= EXTRACT_IN_MEMORY_SIZE:
+        with open_sequential(zip_file) as f:
+            data = f.read()
+    
+    # A ZipFile shares one file position between readers, so every
+    # worker thread opens its own handle on the archive
+    local = threading.local()
+    handles = []
+    
+    def extract_member(item):
+        if cancelled is not None and cancelled.is_set():
+            raise Exception("Update cancelled")
+        
+        info, target = item
+        zip_ref = getattr(local, 'zip_ref', None)
+        if zip_ref is None:
+            # BytesIO shares the bytes object until something writes to it
+            archive = io.BytesIO(data) if data is not None else open_sequential(zip_file)
+            zip_ref = local.zip_ref = zipfile.ZipFile(archive, 'r')
+            handles.append((zip_ref, archive))
+        
+        # One large write per buffer instead of many small ones per member
+        with zip_ref.open(info) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, EXTRACT_BUFFER_SIZE)
+    
+    # zlib releases the GIL while inflating, so members decompress in parallel
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(extract_member, targets))
+    finally:
+        # ZipFile does not close a file object it was handed
+        for zip_ref, archive in handles:
+            zip_ref.close()
+            archive.close()
+
 
 class PlatformDetector:
-    """Detect platform for S3 download"""
+    """Detect platform for S3 download - cached, the platform cannot change in-process"""
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_platform():
         """Get simplified platform name"""
         if sys.platform == 'darwin':
@@ -44,6 +225,7 @@ class PlatformDetector:
             return 'linux'
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_s3_url():
         """Get S3 URL for current platform - Windows priority"""
         platform = PlatformDetector.get_platform()
@@ -56,6 +238,7 @@ class PlatformDetector:
         return url
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_filename():
         """Get filename from S3 URL"""
         url = PlatformDetector.get_s3_url()
@@ -64,15 +247,28 @@ class PlatformDetector:
         return None
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def is_windows():
         """Check if running on Windows (primary target)"""
         return PlatformDetector.get_platform() == 'windows'
 
 
-class UpdateDownloader(QThread):
-    """Thread to download and install updates directly from S3"""
+class DownloadTask(QRunnable):
+    """Runs an UpdateDownloader on a QThreadPool worker thread"""
+    
+    def __init__(self, downloader):
+        super().__init__()
+        self.downloader = downloader
+    
+    def run(self):
+        self.downloader.run()
+
+
+class UpdateDownloader(QObject):
+    """Download and install updates directly from S3 on the shared thread pool"""
     download_progress = Signal(int)  # percentage
     download_complete = Signal(str)  # filepath
+    extract_started = Signal()
     install_complete = Signal()
     error = Signal(str)
     
@@ -81,42 +277,317 @@ class UpdateDownloader(QThread):
         self.platform = PlatformDetector.get_platform()
         self.download_url = PlatformDetector.get_s3_url()
         self.filename = PlatformDetector.get_filename()
-        self.temp_dir = tempfile.mkdtemp()
+        # Filled in by download_file on the worker thread - no disk access on the UI thread
+        self.cache_dir = None
+        self.etag_file = None
+        self.etag = None
+        self.session = _SESSION
+        self.running = False
+        self.cancelled = threading.Event()
         
         if not self.download_url:
             raise Exception(f"No S3 URL configured for {self.platform}")
         
+    @staticmethod
+    def get_cache_dir():
+        """Get persistent cache directory for downloaded updates"""
+        if PlatformDetector.is_windows():
+            # The elevated app installs a 304's cached file unchecked - keep the cache
+            # beside the app, out of reach of unelevated processes in the profile
+            app_dir = os.path.dirname(WindowsUpdater.get_current_executable())
+            cache_dir = app_dir.rstrip('\\/') + ".cache"
+        else:
+            cache_dir = os.path.join(get_data_dir(), "cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+    
+    def start(self):
+        """Schedule the download on the global thread pool"""
+        self.running = True
+        QThreadPool.globalInstance().start(DownloadTask(self))
+    
+    def cancel(self):
+        """Stop a running download or extraction at its next chunk"""
+        self.cancelled.set()
+    
+    def is_running(self):
+        """Check if the download is still in progress"""
+        return self.running
+    
+    def wait(self, timeout_ms):
+        """Wait up to timeout_ms for pool work to finish"""
+        return QThreadPool.globalInstance().waitForDone(timeout_ms)
+    
     def run(self):
         try:
-            self.download_file()
-        except Exception as e:
-            self.error.emit(f"Download failed: {str(e)}")
+            try:
+                file_path = self.download_file()
+            except Exception as e:
+                if not self.cancelled.is_set():
+                    self.error.emit(f"Download failed: {str(e)}")
+                return
+            
+            # Unpack a Windows zip here on the worker thread, right behind the
+            # download - installing then only backs up and hands over to the helper
+            if self.platform == 'windows' and file_path.lower().endswith('.zip'):
+                self.extract_started.emit()
+                try:
+                    app_dir = os.path.dirname(WindowsUpdater.get_current_executable())
+                    WindowsUpdater.stage_zip(file_path, app_dir, self.cancelled)
+                except Exception as e:
+                    if not self.cancelled.is_set():
+                        self.error.emit(f"Extraction failed: {str(e)}")
+                    return
+            
+            self.download_complete.emit(file_path)
+        finally:
+            self.running = False
     
     def download_file(self):
-        """Download the update file from S3 with progress tracking"""
+        """Download the update file from S3 with progress tracking - returns its path"""
+        self.cache_dir = UpdateDownloader.get_cache_dir()
+        self.etag_file = os.path.join(self.cache_dir, "etag.txt")
+        if os.path.exists(self.etag_file):
+            with open(self.etag_file, 'r') as f:
+                self.etag = f.read().strip() or None
+        
+        file_path = os.path.join(self.cache_dir, self.filename)
+        part_path = file_path + ".part"
         try:
-            response = requests.get(self.download_url, stream=True, timeout=30)
-            response.raise_for_status()
+            # Revalidate the cached download - S3 answers 304 if it is still current
+            # Have S3 include the object's stored checksum in the response
+            headers = {'x-amz-checksum-mode': 'ENABLED'}
+            if os.path.exists(file_path):
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+                headers['If-Modified-Since'] = formatdate(os.path.getmtime(file_path), usegmt=True)
             
-            file_path = os.path.join(self.temp_dir, self.filename)
-            total_size = int(response.headers.get('content-length', 0))
+            # Ask S3 for the object size first so it can be split into byte ranges
+            head = self.session.head(self.download_url, headers=headers, timeout=30, allow_redirects=True)
+            if head.status_code == 304:
+                return file_path
+            head.raise_for_status()
+            total_size = int(head.headers.get('content-length', 0))
             
-            with open(file_path, 'wb') as f:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            self.download_progress.emit(progress)
+            # Composite checksums of multipart uploads end in -<parts> and cannot be compared
+            expected_sha256 = head.headers.get('x-amz-meta-sha256')
+            expected_crc32 = head.headers.get('x-amz-checksum-crc32')
+            if expected_crc32 and '-' in expected_crc32:
+                expected_crc32 = None
             
-            self.download_complete.emit(file_path)
+            # Every GET is pinned to the object version the HEAD saw via If-Match
+            etag = head.headers.get('ETag')
+            
+            # Use parallel ranges only for large objects the server can split,
+            # and fall back to a single stream if it ignores Range after all
+            checksums = None
+            use_ranges = total_size > RANGE_MIN_SIZE and head.headers.get('Accept-Ranges') == 'bytes'
+            if use_ranges:
+                checksums = self.download_ranges(part_path, total_size, etag, bool(expected_sha256 or expected_crc32))
+            if checksums is None:
+                checksums = self.download_single(part_path, total_size, etag)
+            
+            # Catch a corrupted download before it reaches the installer
+            self.verify_checksums(part_path, checksums, expected_sha256, expected_crc32)
+            
+            os.replace(part_path, file_path)
+            self.save_etag(etag)
+            
+            return file_path
             
         except Exception as e:
+            # Never leave a partial download behind in the cache
+            if os.path.exists(part_path):
+                os.remove(part_path)
             raise Exception(f"S3 download failed: {str(e)}")
     
+    def save_etag(self, etag):
+        """Remember the ETag of the cached download for the next update"""
+        self.etag = etag
+        if etag:
+            with open(self.etag_file, 'w') as f:
+                f.write(etag)
+        elif os.path.exists(self.etag_file):
+            os.remove(self.etag_file)
+    
+    @staticmethod
+    def file_checksums(file_path):
+        """Compute the SHA-256 hex digest and CRC32 of a file in a single pass"""
+        hasher = hashlib.sha256()
+        crc32 = 0
+        with open_sequential(file_path) as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                crc32 = zlib.crc32(chunk, crc32)
+        return hasher.hexdigest(), crc32
+    
+    @staticmethod
+    def verify_checksums(file_path, checksums, expected_sha256, expected_crc32):
+        """Compare the checksums of the download with the ones published on S3"""
+        sha256, crc32 = checksums
+        mismatch = expected_sha256 and sha256 != expected_sha256.strip().lower()
+        
+        # S3 sends the CRC as base64 of its 4 big-endian bytes
+        if expected_crc32 and not mismatch:
+            mismatch = base64.b64encode(crc32.to_bytes(4, 'big')).decode() != expected_crc32.strip()
+        
+        if mismatch:
+            os.remove(file_path)
+            raise Exception("Checksum mismatch - the update file is corrupted")
+    
+    def download_single(self, file_path, total_size, etag):
+        """Download the whole file over one connection - returns its (SHA-256, CRC32)"""
+        response = self.session.get(self.download_url, headers=self.if_match(etag), stream=True, timeout=30)
+        self.check_unchanged(response)
+        response.raise_for_status()
+        
+        # The HEAD size is what has to arrive - fall back to the GET's own header
+        total_size = total_size or int(response.headers.get('content-length', 0))
+        self.downloaded = 0
+        self.last_pct = -1
+        self.last_emit = 0.0
+        
+        # Checksum the data as it arrives instead of reading the file back
+        hasher = hashlib.sha256()
+        crc32 = 0
+        received = 0
+        with open_unbuffered(file_path) as f:
+            # Allocate the whole file once instead of extending it on every write
+            if total_size > 0:
+                preallocate(f, total_size)
+            
+            for chunk in self.read_chunks(response):
+                write_all(f, chunk)
+                hasher.update(chunk)
+                crc32 = zlib.crc32(chunk, crc32)
+                received += len(chunk)
+                self.report_progress(len(chunk), total_size)
+        
+        # A body that ends early would leave the preallocated tail zero-filled
+        self.check_complete(received, total_size)
+        return hasher.hexdigest(), crc32
+    
+    def download_ranges(self, file_path, total_size, etag, checksum):
+        """Download the file as parallel byte ranges - returns its (SHA-256, CRC32)
+        if checksum is set, (None, None) if not, and None if ranges are unsupported"""
+        part_size = -(-total_size // RANGE_PARTS)
+        ranges = [(start, min(start + part_size, total_size) - 1)
+                  for start in range(0, total_size, part_size)]
+        
+        # Pre-size the file so every worker can write its range in place
+        with open_unbuffered(file_path) as f:
+            preallocate(f, total_size)
+        
+        self.downloaded = 0
+        self.last_pct = -1
+        self.last_emit = 0.0
+        self.progress_lock = threading.Lock()
+        self.range_responses = []
+        self.ranges_aborted = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=max(1, len(ranges) - 1))
+        try:
+            futures = [executor.submit(self.download_range, file_path, start, end, total_size, etag)
+                       for start, end in ranges[1:]]
+            
+            # This pool thread takes the first range itself instead of idling on the others
+            start, end = ranges[0]
+            results = [self.download_range(file_path, start, end, total_size, etag)]
+            results += [future.result() for future in futures]
+        except BaseException:
+            # Report the failure now - stop the other ranges instead of letting them finish
+            self.ranges_aborted.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for response in list(self.range_responses):
+                response.close()
+            raise
+        finally:
+            # Only returns once no worker has the file open any more
+            executor.shutdown()
+        
+        if not all(results):
+            return None
+        
+        # Ranges arrive out of order - checksum the finished file in one pass
+        if checksum:
+            return self.file_checksums(file_path)
+        return None, None
+    
+    def download_range(self, file_path, start, end, total_size, etag):
+        """Download bytes start..end into the same offsets of file_path"""
+        headers = self.if_match(etag)
+        headers['Range'] = f'bytes={start}-{end}'
+        response = self.session.get(self.download_url, headers=headers, stream=True, timeout=30)
+        self.range_responses.append(response)
+        with response:
+            self.check_unchanged(response)
+            response.raise_for_status()
+            
+            # 200 means the server sent the whole object instead of the range
+            if response.status_code != 206:
+                return False
+            
+            # Each worker has its own handle - os.pwrite is not available on Windows
+            received = 0
+            with open_unbuffered(file_path, truncate=False) as f:
+                f.seek(start)
+                for chunk in self.read_chunks(response, self.ranges_aborted):
+                    write_all(f, chunk)
+                    received += len(chunk)
+                    with self.progress_lock:
+                        self.report_progress(len(chunk), total_size)
+            
+            # The file is preallocated - a short range leaves a zero-filled hole
+            self.check_complete(received, end - start + 1)
+        
+        return True
+    
+    @staticmethod
+    def if_match(etag):
+        """Request headers that make S3 refuse the GET if the object has changed"""
+        return {'If-Match': etag} if etag else {}
+    
+    @staticmethod
+    def check_unchanged(response):
+        """Fail when S3 answers 412 - a new release replaced the object mid-download"""
+        if response.status_code == 412:
+            response.close()
+            raise Exception("The update was replaced on S3 during the download - try again")
+    
+    @staticmethod
+    def check_complete(received, expected):
+        """Fail when a response body ended before all of its bytes arrived"""
+        if expected > 0 and received != expected:
+            raise Exception(f"Incomplete download - received {received} of {expected} bytes")
+    
+    def read_chunks(self, response, aborted=None):
+        """Yield the response body in DOWNLOAD_CHUNK_SIZE reads straight off the socket -
+        stops once the update is cancelled or the aborted event is set"""
+        # Reading raw skips iter_content's generator layers and any content decoding
+        raw = response.raw
+        while True:
+            if self.cancelled.is_set():
+                raise Exception("Update cancelled")
+            if aborted is not None and aborted.is_set():
+                raise Exception("Download aborted")
+            chunk = raw.read(DOWNLOAD_CHUNK_SIZE, decode_content=False)
+            if not chunk:
+                return
+            yield chunk
+    
+    def report_progress(self, size, total_size):
+        """Count downloaded bytes and emit download_progress when the percentage changes"""
+        self.downloaded += size
+        
+        # Only emit when the percentage changes, and at most every PROGRESS_INTERVAL -
+        # every emit is a queued cross-thread event and a repaint on the GUI thread
+        if total_size > 0:
+            progress = self.downloaded * 100 // total_size
+            now = time.monotonic()
+            if progress != self.last_pct and (now - self.last_emit >= PROGRESS_INTERVAL or progress == 100):
+                self.download_progress.emit(progress)
+                self.last_pct = progress
+                self.last_emit = now
+    
     def install_update(self, downloaded_file):
         """Platform-specific installation - Windows optimized"""
         try:
@@ -133,6 +604,21 @@ class UpdateDownloader(QThread):
             
         except Exception as e:
             raise Exception(f"Installation failed: {str(e)}")
+    
+    def install_mac(self, downloaded_file):
+        """Mac installation"""
+        # Scratch space for mounting and extracting, in the app's own data directory
+        data_dir = get_data_dir()
+        os.makedirs(data_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix='update_', dir=data_dir)
+        try:
+            MacUpdater.install(downloaded_file, temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def install_windows(self, downloaded_file):
+        """Windows installation"""
+        WindowsUpdater.install(downloaded_file)
 
 
 class MacUpdater:
@@ -165,14 +651,42 @@ class MacUpdater:
         else:
             return os.path.abspath(__file__)
     
+    @staticmethod
+    def move(source, target):
+        """Move source over target - a single atomic rename when both are on the same volume"""
+        target_parent = os.path.dirname(os.path.abspath(target))
+        if os.stat(source).st_dev != os.stat(target_parent).st_dev:
+            shutil.move(source, target)
+            return
+        
+        # rename cannot replace a non-empty directory - drop a stale backup first
+        if os.path.isdir(source) and os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(source, target)
+    
     @staticmethod
     def install_app_bundle(app_file, current_exe, backup_path):
         """Install .app bundle"""
         if os.path.exists(current_exe):
-            shutil.move(current_exe, backup_path)
-        shutil.move(app_file, current_exe)
+            MacUpdater.move(current_exe, backup_path)
+        MacUpdater.move(app_file, current_exe)
         os.chmod(current_exe, 0o755)
     
+    @staticmethod
+    def find_first(root, predicate):
+        """Return the first path under root whose name matches predicate, or None"""
+        # scandir entries carry their type, and the search stops at the first hit
+        # instead of listing the whole tree like os.walk
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if predicate(entry.name):
+                        return entry.path
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        return None
+    
     @staticmethod
     def install_from_dmg(dmg_file, current_exe, backup_path, temp_dir):
         """Install from .dmg file"""
@@ -184,59 +698,103 @@ class MacUpdater:
         
         try:
             # Find .app in mounted volume
-            for item in os.listdir(mount_point):
-                if item.endswith('.app'):
-                    app_path = os.path.join(mount_point, item)
-                    if os.path.exists(current_exe):
-                        shutil.move(current_exe, backup_path)
-                    shutil.copytree(app_path, current_exe)
-                    break
+            app_path = MacUpdater.find_first(mount_point, lambda name: name.endswith('.app'))
+            if app_path:
+                if os.path.exists(current_exe):
+                    MacUpdater.move(current_exe, backup_path)
+                MacUpdater.copy_bundle(app_path, current_exe)
         finally:
             # Unmount DMG
             subprocess.run(['hdiutil', 'detach', mount_point])
     
+    @staticmethod
+    def copy_bundle(source, target):
+        """Copy an .app bundle - an APFS clone when possible, a real copy otherwise"""
+        import ctypes
+        
+        # clonefile shares the data blocks instead of copying them, but only
+        # works within one APFS volume - EXDEV and friends fall through to copytree
+        libc = ctypes.CDLL(None, use_errno=True)
+        clonefile = getattr(libc, 'clonefile', None)
+        if clonefile is not None and clonefile(os.fsencode(source), os.fsencode(target), 0) == 0:
+            return
+        
+        # Frameworks in the bundle are full of symlinks - copy them as links
+        shutil.copytree(source, target, symlinks=True)
+    
     @staticmethod
     def install_pkg(pkg_file):
         """Install .pkg file (requires admin privileges)"""
         subprocess.run(['sudo', 'installer', '-pkg', pkg_file, '-target', '/'], check=True)
     
+    @staticmethod
+    def find_app_member(members):
+        """Find the application in the zip central directory - an .app bundle
+        prefix, otherwise the first member with an executable bit"""
+        # Finder-made zips carry resource forks under __MACOSX/ - never the app
+        members = [info for info in members if not info.filename.startswith('__MACOSX/')]
+        
+        for info in members:
+            parts = info.filename.split('/')
+            for i, part in enumerate(parts[:-1]):
+                if part.endswith('.app'):
+                    return '/'.join(parts[:i + 1])
+        
+        for info in members:
+            if not info.is_dir() and (info.external_attr >> 16) & 0o111:
+                return info.filename
+        return None
+    
     @staticmethod
     def install_from_zip(zip_file, current_exe, backup_path, temp_dir):
-        """Install from .zip file"""
-        extract_dir = os.path.join(temp_dir, "extract")
+        """Install from .zip file - only the application itself is extracted"""
+        extract_root = os.path.abspath(os.path.join(temp_dir, "extract"))
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        # Find executable in extracted files
-        for root, dirs, files in os.walk(extract_dir):
-            for file in files:
-                if file.endswith('.app') or os.access(os.path.join(root, file), os.X_OK):
-                    extracted_exe = os.path.join(root, file)
-                    if os.path.exists(current_exe):
-                        shutil.move(current_exe, backup_path)
-                    shutil.move(extracted_exe, current_exe)
-                    os.chmod(current_exe, 0o755)
-                    return
+            members = zip_ref.infolist()
+        
+        app_name = MacUpdater.find_app_member(members)
+        if app_name is None:
+            return
+        
+        # Extract just the application's members, in parallel like on Windows
+        app_members = [info for info in members
+                       if info.filename == app_name or info.filename.startswith(app_name + '/')]
+        extract_zip(zip_file, extract_root, app_members)
+        
+        # Keep the permission bits so the bundle's binaries stay executable
+        for info in app_members:
+            mode = (info.external_attr >> 16) & 0o777
+            if mode and not info.is_dir():
+                os.chmod(os.path.join(extract_root, info.filename), mode)
+        
+        extracted_app = os.path.join(extract_root, app_name)
+        if os.path.exists(current_exe):
+            MacUpdater.move(current_exe, backup_path)
+        MacUpdater.move(extracted_app, current_exe)
+        os.chmod(current_exe, 0o755)
 
 
 class WindowsUpdater:
     """Windows-specific update handling - Industrial grade file replacement"""
     
+    # (zip file, app source dir) of an update already extracted by stage_zip
+    staged_update = None
+    
     @staticmethod
-    def install(downloaded_file, temp_dir):
+    def install(downloaded_file):
         """Install update on Windows - Proper file replacement handling"""
         current_exe = WindowsUpdater.get_current_executable()
         app_dir = os.path.dirname(current_exe)
-        backup_dir = os.path.join(temp_dir, "backup")
+        backup_dir = WindowsUpdater.get_backup_dir(app_dir)
         
         file_ext = Path(downloaded_file).suffix.lower()
         
         if file_ext == '.exe':
-            WindowsUpdater.install_exe(downloaded_file, current_exe, app_dir, backup_dir, temp_dir)
+            WindowsUpdater.install_exe(downloaded_file, current_exe, app_dir, backup_dir)
         elif file_ext == '.msi':
             WindowsUpdater.install_msi(downloaded_file)
         elif file_ext == '.zip':
-            WindowsUpdater.install_from_zip(downloaded_file, current_exe, app_dir, backup_dir, temp_dir)
+            WindowsUpdater.install_from_zip(downloaded_file, current_exe, app_dir, backup_dir)
         else:
             raise Exception(f"Unsupported Windows update file type: {file_ext}")
     
@@ -246,27 +804,56 @@ class WindowsUpdater:
         if getattr(sys, 'frozen', False):
             return sys.executable
         else:
-            return os.path.abspath(__file__)
+            # When running from Python script, simulate the executable path
+            # This is for testing purposes
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            return os.path.join(script_dir, "BuildTestSystem.exe")
     
     @staticmethod
     def get_current_process_id():
         """Get current process ID"""
         return os.getpid()
     
+    @staticmethod
+    def get_staging_dir(app_dir):
+        """Get the directory updates are staged in - next to the app, on the same volume"""
+        return app_dir.rstrip('\\/') + ".staging"
+    
+    @staticmethod
+    def get_backup_dir(app_dir):
+        """Get the directory the running version is backed up to - next to the app, so
+        the backup is made of hard links; the update helper removes it once done"""
+        return app_dir.rstrip('\\/') + ".backup"
+    
     @staticmethod
     def create_backup(app_dir, backup_dir):
-        """Create backup of current application"""
+        """Create backup of current application as hard links - no file data is copied"""
         try:
             if os.path.exists(backup_dir):
                 shutil.rmtree(backup_dir)
-            shutil.copytree(app_dir, backup_dir, ignore=shutil.ignore_patterns('*.tmp', '*.log'))
+            
+            # The update helper replaces files by renaming over them, so the backup
+            # links keep pointing at the old file contents
+            for root, dirs, files in os.walk(app_dir):
+                target_dir = os.path.join(backup_dir, os.path.relpath(root, app_dir))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in files:
+                    if name.endswith(('.tmp', '.log')):
+                        continue
+                    source = os.path.join(root, name)
+                    target = os.path.join(target_dir, name)
+                    try:
+                        os.link(source, target)
+                    except OSError:
+                        # Backup is on another volume - hard links are not possible
+                        shutil.copy2(source, target)
             return True
         except Exception as e:
             print(f"Backup failed: {e}")
             return False
     
     @staticmethod
-    def install_exe(exe_file, current_exe, app_dir, backup_dir, temp_dir):
+    def install_exe(exe_file, current_exe, app_dir, backup_dir):
         """Install single .exe file with proper process handling"""
         current_pid = WindowsUpdater.get_current_process_id()
         
@@ -274,81 +861,19 @@ class WindowsUpdater:
         if not WindowsUpdater.create_backup(app_dir, backup_dir):
             raise Exception("Failed to create backup")
         
-        # Create advanced update script that handles process termination
-        update_script = os.path.join(temp_dir, "windows_updater.bat")
-        
-        script_content = f'''@echo off
-setlocal EnableDelayedExpansion
-
-echo [UPDATER] Starting Windows Update Process...
-echo [UPDATER] Current PID: {current_pid}
-echo [UPDATER] Target: {current_exe}
-
-REM Wait for main process to exit
-echo [UPDATER] Waiting for application to close...
-timeout /t 3 /nobreak > nul
-
-REM Force kill if still running (safety measure)
-taskkill /PID {current_pid} /F > nul 2>&1
-
-REM Wait a bit more to ensure file handles are released
-timeout /t 2 /nobreak > nul
-
-REM Attempt file replacement with retry logic
-set RETRY_COUNT=0
-:RETRY_COPY
-
-if !RETRY_COUNT! GTR 10 (
-    echo [UPDATER] ERROR: Failed to replace file after 10 attempts
-    goto ERROR
-)
-
-echo [UPDATER] Attempt !RETRY_COUNT!: Replacing executable...
-
-REM Try to copy the new file
-copy /Y "{exe_file}" "{current_exe}" > nul 2>&1
-
-if errorlevel 1 (
-    echo [UPDATER] Copy failed, retrying in 1 second...
-    timeout /t 1 /nobreak > nul
-    set /a RETRY_COUNT+=1
-    goto RETRY_COPY
-)
-
-echo [UPDATER] File replacement successful!
-
-REM Start the updated application
-echo [UPDATER] Starting updated application...
-start "" "{current_exe}"
-
-echo [UPDATER] Update completed successfully!
-goto CLEANUP
-
-:ERROR
-echo [UPDATER] Update failed! Restoring from backup...
-if exist "{backup_dir}" (
-    robocopy "{backup_dir}" "{app_dir}" /E /IS /IT > nul
-    echo [UPDATER] Backup restored
-    start "" "{current_exe}"
-) else (
-    echo [UPDATER] No backup found! Manual intervention required.
-)
-
-:CLEANUP
-REM Clean up temporary files
-timeout /t 2 /nobreak > nul
-del "{exe_file}" > nul 2>&1
-del "%0" > nul 2>&1
-'''
-        
-        with open(update_script, 'w') as f:
-            f.write(script_content)
-        
-        # Run update script detached from current process
-        subprocess.Popen(
-            update_script, 
-            shell=True, 
-            creationflags=subprocess.CREATE_NEW_CONSOLE | subprocess.DETACHED_PROCESS
+        # Stage the new exe next to the app under its final name, so the update
+        # helper can move it into place by renaming - the cached download stays.
+        # Always a real copy: a hard link would share the cache file's ACL
+        staging_dir = WindowsUpdater.get_staging_dir(app_dir)
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        os.makedirs(staging_dir)
+        staged_exe = os.path.join(staging_dir, os.path.basename(current_exe))
+        shutil.copy2(exe_file, staged_exe)
+        
+        # Same handover as a zip update - no batch script and no fixed sleeps
+        HelperLauncher.launch_helper(
+            [staging_dir, app_dir, str(current_pid), current_exe, backup_dir, staging_dir]
         )
     
     @staticmethod
@@ -357,119 +882,58 @@ del "%0" > nul 2>&1
         subprocess.run(['msiexec', '/i', msi_file, '/quiet'], check=True)
     
     @staticmethod
-    def install_from_zip(zip_file, current_exe, app_dir, backup_dir, temp_dir):
-        """Install from .zip file - Full application directory replacement"""
-        current_pid = WindowsUpdater.get_current_process_id()
+    def stage_zip(zip_file, app_dir, cancelled=None):
+        """Extract the update next to the app - returns the directory holding the new exe"""
+        # Extract straight into a staging directory next to the app - it is on the
+        # same volume, so the update helper can move files into place by renaming
+        staging_dir = WindowsUpdater.get_staging_dir(app_dir)
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
         
-        # Extract the zip file
-        extract_dir = os.path.join(temp_dir, "extract")
+        # Find the main application directory in the zip central directory -
+        # always BuildTestSystem.exe regardless of current executable detection
+        main_exe_name = "BuildTestSystem.exe"
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+            members = zip_ref.infolist()
         
-        # Find the main application directory in extracted files
-        app_source_dir = None
-        main_exe_name = os.path.basename(current_exe)
+        exe_names = [info.filename for info in members
+                     if not info.is_dir() and info.filename.split('/')[-1] == main_exe_name]
+        if not exe_names:
+            raise Exception(f"Could not find {main_exe_name} in the update package")
         
-        for root, dirs, files in os.walk(extract_dir):
-            if main_exe_name in files:
-                app_source_dir = root
-                break
+        # The shallowest copy is the application itself
+        exe_name = min(exe_names, key=lambda name: name.count('/'))
+        app_source_dir = os.path.join(staging_dir, *exe_name.split('/')[:-1])
         
-        if not app_source_dir:
-            raise Exception(f"Could not find {main_exe_name} in the update package")
+        try:
+            extract_zip(zip_file, staging_dir, members, cancelled)
+        except Exception:
+            # Never leave a half-extracted update next to the app
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        WindowsUpdater.staged_update = (zip_file, app_source_dir)
+        return app_source_dir
+    
+    @staticmethod
+    def install_from_zip(zip_file, current_exe, app_dir, backup_dir):
+        """Install from .zip file - Full application directory replacement"""
+        current_pid = WindowsUpdater.get_current_process_id()
+        
+        # Usually the download worker has already extracted the update
+        staged = WindowsUpdater.staged_update
+        if staged and staged[0] == zip_file and os.path.exists(staged[1]):
+            app_source_dir = staged[1]
+        else:
+            app_source_dir = WindowsUpdater.stage_zip(zip_file, app_dir)
         
         # Create backup
         if not WindowsUpdater.create_backup(app_dir, backup_dir):
             raise Exception("Failed to create backup")
         
-        # Create advanced directory replacement script
-        update_script = os.path.join(temp_dir, "windows_dir_updater.bat")
-        
-        script_content = f'''@echo off
-setlocal EnableDelayedExpansion
-
-echo [DIR-UPDATER] Starting Windows Directory Update Process...
-echo [DIR-UPDATER] Current PID: {current_pid}
-echo [DIR-UPDATER] Target Directory: {app_dir}
-echo [DIR-UPDATER] Source Directory: {app_source_dir}
-
-REM Wait for main process to exit
-echo [DIR-UPDATER] Waiting for application to close...
-timeout /t 3 /nobreak > nul
-
-REM Force kill if still running (safety measure)
-taskkill /PID {current_pid} /F > nul 2>&1
-
-REM Wait for file handles to be released
-timeout /t 2 /nobreak > nul
-
-REM Attempt directory replacement with retry logic
-set RETRY_COUNT=0
-:RETRY_REPLACE
-
-if !RETRY_COUNT! GTR 5 (
-    echo [DIR-UPDATER] ERROR: Failed to replace directory after 5 attempts
-    goto ERROR
-)
-
-echo [DIR-UPDATER] Attempt !RETRY_COUNT!: Replacing application directory...
-
-REM Use robocopy for reliable directory replacement
-robocopy "{app_source_dir}" "{app_dir}" /E /IS /IT /R:3 /W:1 > nul 2>&1
-
-if errorlevel 8 (
-    echo [DIR-UPDATER] Copy failed, retrying in 2 seconds...
-    timeout /t 2 /nobreak > nul
-    set /a RETRY_COUNT+=1
-    goto RETRY_REPLACE
-)
-
-echo [DIR-UPDATER] Directory replacement successful!
-
-REM Start the updated application
-echo [DIR-UPDATER] Starting updated application...
-start "" "{current_exe}"
-
-echo [DIR-UPDATER] Update completed successfully!
-goto CLEANUP
-
-:ERROR
-echo [DIR-UPDATER] Update failed! Restoring from backup...
-if exist "{backup_dir}" (
-    robocopy "{backup_dir}" "{app_dir}" /E /IS /IT > nul
-    echo [DIR-UPDATER] Backup restored
-    start "" "{current_exe}"
-) else (
-    echo [DIR-UPDATER] No backup found! Manual intervention required.
-)
-
-:CLEANUP
-REM Clean up temporary files
-timeout /t 3 /nobreak > nul
-rmdir /s /q "{extract_dir}" > nul 2>&1
-del "%0" > nul 2>&1
-'''
-        
-        with open(update_script, 'w') as f:
-            f.write(script_content)
-        
-        # Run update script detached from current process
-        subprocess.Popen(
-            update_script, 
-            shell=True, 
-            creationflags=subprocess.CREATE_NEW_CONSOLE | subprocess.DETACHED_PROCESS
+        # Hand over to the update helper - it waits for this process to exit and
+        # moves the staged files into place with MoveFileExW instead of copying them
+        staging_dir = WindowsUpdater.get_staging_dir(app_dir)
+        HelperLauncher.launch_helper(
+            [app_source_dir, app_dir, str(current_pid), current_exe, backup_dir, staging_dir]
         )
-
-
-# Add platform-specific installation to UpdateDownloader
-def install_mac(self, downloaded_file):
-    """Mac installation"""
-    MacUpdater.install(downloaded_file, self.temp_dir)
-
-def install_windows(self, downloaded_file):
-    """Windows installation"""
-    WindowsUpdater.install(downloaded_file, self.temp_dir)
-
-# Monkey patch the methods
-UpdateDownloader.install_mac = install_mac
-UpdateDownloader.install_windows = install_windows
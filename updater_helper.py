@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Update helper for Build Test System
+
+Started detached by the application right before it exits. Waits for the
+application process to go away, moves the staged update over the install
+directory, starts the new version and cleans up after itself - the whole
+update runs in this one process.
+
+Usage: updater_helper <source_dir> <app_dir> <pid> <current_exe> <backup_dir> <staging_dir>
+       updater_helper --prewarm <event_name> <job_file> <pid>
+
+With --prewarm the helper is started together with the application and
+parks on a named event, so the interpreter is already up when an update
+is staged. The application writes the arguments above to job_file as a
+JSON list and signals the event.
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import ctypes
+import psutil
+
+
+MOVEFILE_REPLACE_EXISTING = 0x1
+MOVEFILE_WRITE_THROUGH = 0x8
+
+REPLACE_ATTEMPTS = 3
+
+# Seconds to wait for the application to exit before killing it
+PROCESS_EXIT_TIMEOUT = 30
+
+SYNCHRONIZE = 0x00100000
+INFINITE = 0xFFFFFFFF
+WAIT_OBJECT_0 = 0
+
+
+def wait_for_job(event_name, job_file, pid):
+    """Park until the application signals a staged update - returns its arguments"""
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenEventW.restype = ctypes.c_void_p
+    kernel32.OpenProcess.restype = ctypes.c_void_p
+
+    event = kernel32.OpenEventW(SYNCHRONIZE, False, event_name)
+    process = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+    if not event or not process:
+        return None
+
+    # Wake on whichever comes first - the update event or the application exiting
+    handles = (ctypes.c_void_p * 2)(event, process)
+    result = kernel32.WaitForMultipleObjects(2, handles, False, INFINITE)
+    kernel32.CloseHandle(ctypes.c_void_p(event))
+    kernel32.CloseHandle(ctypes.c_void_p(process))
+
+    if result != WAIT_OBJECT_0:
+        return None
+    with open(job_file, 'r') as f:
+        job = json.load(f)
+    os.remove(job_file)
+    return job
+
+
+def wait_for_process(pid):
+    """Block until the application process has exited - returns as soon as it does"""
+    try:
+        process = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+
+    gone, alive = psutil.wait_procs([process], timeout=PROCESS_EXIT_TIMEOUT)
+
+    # Still running after the grace period - kill it so its files are released
+    for process in alive:
+        process.kill()
+    psutil.wait_procs(alive, timeout=PROCESS_EXIT_TIMEOUT)
+
+
+def replace_file(source, target):
+    """Move source over target - a directory entry rename on the same volume"""
+    if not sys.platform.startswith('win'):
+        os.replace(source, target)
+        return
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    if kernel32.MoveFileExW(source, target, MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH):
+        return
+
+    # Target is still locked - ReplaceFileW swaps it out and keeps the old file aside
+    if not os.path.exists(target) or not kernel32.ReplaceFileW(target, source, target + ".old", 0, None, None):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def replace_tree(source_dir, app_dir):
+    """Move every file of source_dir to the same relative path in app_dir"""
+    for root, dirs, files in os.walk(source_dir):
+        target_dir = os.path.join(app_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            replace_file(os.path.join(root, name), os.path.join(target_dir, name))
+
+
+def restore_backup(backup_dir, app_dir):
+    """Copy the backup back over the application directory"""
+    if not os.path.exists(backup_dir):
+        return False
+
+    for root, dirs, files in os.walk(backup_dir):
+        target_dir = os.path.join(app_dir, os.path.relpath(root, backup_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_dir, name)
+            # The backup is made of hard links - files that were never replaced
+            # are still the same file and need no restoring
+            if os.path.exists(target) and os.path.samefile(source, target):
+                continue
+            shutil.copy2(source, target)
+    return True
+
+
+def start_application(current_exe):
+    """Start the application the same way the shell would"""
+    if sys.platform.startswith('win'):
+        os.startfile(current_exe)
+
+
+def cleanup(staging_dir, backup_dir):
+    """Remove the emptied staging tree and the backup"""
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def main():
+    args = sys.argv[1:]
+
+    if args[:1] == ['--prewarm'] and len(args) == 4:
+        args = wait_for_job(args[1], args[2], int(args[3]))
+        if args is None:
+            # Application closed without staging an update
+            return 0
+
+    if len(args) != 6:
+        print(__doc__)
+        return 1
+
+    source_dir, app_dir, pid, current_exe, backup_dir, staging_dir = args
+
+    print(f"[UPDATER] Waiting for PID {pid} to exit...")
+    wait_for_process(int(pid))
+
+    print("[UPDATER] Replacing files...")
+    for attempt in range(1, REPLACE_ATTEMPTS + 1):
+        try:
+            replace_tree(source_dir, app_dir)
+            break
+        except OSError as e:
+            print(f"[UPDATER] Replace failed, retry {attempt}: {e}")
+            time.sleep(1)
+    else:
+        print("[UPDATER] Update failed, restoring backup...")
+        if restore_backup(backup_dir, app_dir):
+            start_application(current_exe)
+        return 1
+
+    print("[UPDATER] Files updated successfully")
+    start_application(current_exe)
+    cleanup(staging_dir, backup_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())